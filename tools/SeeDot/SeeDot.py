@@ -38,8 +38,8 @@ class MainDriver:
         # additional arguments for MingW-compiler
         parser.add_argument("--mingw", action="store_true",
                             help="Use MingW with makefle as toolchain")
-        parser.add:argument("--gcc",
-                            "Path to bin-dir of mingw")
+        parser.add_argument("--gcc", metavar='',
+                            help="Path to bin-dir of mingw")
 
         self.args = parser.parse_args()
 
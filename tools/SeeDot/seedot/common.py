@@ -20,6 +20,10 @@ msbuildPathOptions = [r"C:\Program Files (x86)\Microsoft Visual Studio\2017\Comm
                       r"C:\Program Files (x86)\Microsoft Visual Studio\2017\Professional\MSBuild\15.0\Bin\MSBuild.exe"
                       ]
 
+# MingW toolchain, set from the command line
+mingw = False
+gccPath = None
+
 
 class Algo:
     Bonsai = "bonsai"
@@ -2,12 +2,19 @@
 # Licensed under the MIT license.
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
 import datetime
 from distutils.dir_util import copy_tree
+import glob
+import io
+from itertools import repeat
 import os
 import shutil
 import operator
 import tempfile
+import threading
+import time
 import traceback
 
 from seedot.compiler.converter.converter import Converter
@@ -18,6 +25,49 @@ from seedot.predictor import Predictor
 import seedot.util as Util
 
 
+# Module attributes of Common which are set by the driver at runtime and
+# need to be forwarded to the worker processes of the parallel search
+runtimeConfig = ["tempdir", "outdir", "mingw", "gccPath", "msbuildPath"]
+
+
+def getRuntimeConfig():
+    return {name: getattr(Common, name) for name in runtimeConfig if hasattr(Common, name)}
+
+
+def removeDirs(dirs: list):
+    for path in dirs:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Hard-link a file if the filesystem supports it and copy it otherwise. Used
+# for files which are only read by the workers of the parallel search.
+def linkOrCopy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# Compile and run the generated code for a single scaling factor in a worker
+# process. Module globals are not shared across processes, hence the runtime
+# config of the driver is passed in explicitly and restored before running.
+# The output of the worker is captured and returned so that the driver can
+# print the logs of the scaling factors in order.
+def runSearchWorker(config, algo, trainingFile, testingFile, modelDir, sf):
+    for name, value in config.items():
+        setattr(Common, name, value)
+    Common.tempdir = os.path.join(config["tempdir"], "search", "sf" + str(sf))
+
+    log = io.StringIO()
+    with redirect_stdout(log), redirect_stderr(log):
+        obj = Main(algo, Common.Version.Fixed, Common.Target.X86,
+                   trainingFile, testingFile, modelDir, sf)
+        res, exit = obj.runOnce(
+            Common.Version.Fixed, Common.DatasetType.Training, Common.Target.X86, sf)
+
+    return res, exit, obj.accuracy.get(sf), log.getvalue()
+
+
 class Main:
 
     def __init__(self, algo, version, target, trainingFile, testingFile, modelDir, sf):
@@ -124,29 +174,91 @@ class Main:
 
         return True, False
 
+    # Create a private build directory for each scaling factor so that the
+    # workers can compile and build the Predictor project without overwriting
+    # each other's files. Only the files which are written or compiled are
+    # copied, the dataset is linked as it is only read.
+    def setupSearchDir(self, sf):
+        searchDir = os.path.join(Common.tempdir, "search", "sf" + str(sf))
+        os.makedirs(searchDir)
+
+        for entry in os.scandir(Common.tempdir):
+            if entry.is_file() and (entry.name.endswith((".cpp", ".h", ".sd", ".vcxproj")) or entry.name == "Makefile"):
+                shutil.copy2(entry.path, searchDir)
+
+        shutil.copytree(os.path.join(Common.tempdir, "input"), os.path.join(
+            searchDir, "input"), copy_function=linkOrCopy)
+
+        profileLogFile = os.path.join(
+            "output", self.algo + "-float", "profile.txt")
+        if os.path.isfile(os.path.join(Common.tempdir, profileLogFile)):
+            os.makedirs(os.path.dirname(os.path.join(
+                searchDir, profileLogFile)), exist_ok=True)
+            shutil.copy2(os.path.join(Common.tempdir, profileLogFile),
+                         os.path.join(searchDir, profileLogFile))
+
+    # Rename a directory which is to be deleted, this is atomic and frees up
+    # its name immediately
+    def retireDir(self, path):
+        staleDir = "%s.old-%d-%d" % (path, os.getpid(), time.time_ns())
+        os.replace(path, staleDir)
+        return staleDir
+
     # Iterate over multiple scaling factors and store their accuracies
     def performSearch(self):
         start, end = Common.maxScaleRange
         searching = False
 
-        for i in range(start, end, -1):
-            print("Testing with max scale factor of " + str(i))
-
-            res, exit = self.runOnce(
-                Common.Version.Fixed, Common.DatasetType.Training, Common.Target.X86, i)
-
-            if exit == True:
-                return False
-
-            # The iterator logic is as follows:
-            # Search begins when the first valid scaling factor is found (runOnce returns True)
-            # Search ends when the execution fails on a particular scaling factor (runOnce returns False)
-            # This is the window where valid scaling factors exist and we
-            # select the one with the best accuracy
-            if res == True:
-                searching = True
-            elif searching == True:
-                break
+        # Move the search directory of an interrupted run out of the way. It is
+        # deleted along with the directory of this run once the search is done.
+        searchDir = os.path.join(Common.tempdir, "search")
+        staleDirs = glob.glob(searchDir + ".old-*")
+        if os.path.exists(searchDir):
+            staleDirs.append(self.retireDir(searchDir))
+
+        scales = list(range(start, end, -1))
+        for i in scales:
+            self.setupSearchDir(i)
+
+        # Each scaling factor is an independent compile, build and execute
+        # cycle, so they are run in parallel. The results are inspected in
+        # order as soon as they are available.
+        failed = False
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(runSearchWorker, repeat(getRuntimeConfig()), repeat(self.algo),
+                                   repeat(self.trainingFile), repeat(self.testingFile), repeat(self.modelDir), scales)
+
+            for i, (res, exit, acc, log) in zip(scales, results):
+                print("Testing with max scale factor of " + str(i))
+                print(log, end='')
+
+                if exit == True:
+                    failed = True
+                    break
+
+                # The iterator logic is as follows:
+                # Search begins when the first valid scaling factor is found (runOnce returns True)
+                # Search ends when the execution fails on a particular scaling factor (runOnce returns False)
+                # This is the window where valid scaling factors exist and we
+                # select the one with the best accuracy
+                if res == True:
+                    searching = True
+                    self.accuracy[i] = acc
+                elif searching == True:
+                    break
+
+            # The scaling factors past the window are not needed
+            executor.shutdown(cancel_futures=True)
+
+        # Delete the build directories in the background rather than waiting on
+        # a recursive delete. Directories whose deletion doesn't finish before
+        # the driver exits are picked up by the next search.
+        staleDirs.append(self.retireDir(searchDir))
+        threading.Thread(target=removeDirs, args=(
+            staleDirs,), daemon=True).start()
+
+        if failed == True:
+            return False
 
         # If search didn't begin at all, something went wrong
         if searching == False:
@@ -204,7 +316,7 @@ class Main:
             return False
 
         # Compile and run code using the best scaling factor
-        res = self.runOnce(
+        res, exit = self.runOnce(
             Common.Version.Fixed, Common.DatasetType.Testing, Common.Target.X86, self.sf)
         if res == False:
             return False
@@ -347,8 +459,8 @@ class MainDriver:
         # additional arguments for MingW-compiler
         parser.add_argument("--mingw", action="store_true",
                             help="Use MingW with makefle as toolchain")
-        parser.add:argument("--gcc",
-                            "Path to bin-dir of mingw")
+        parser.add_argument("--gcc", metavar='',
+                            help="Path to bin-dir of mingw")
 
         self.args = parser.parse_args()
 
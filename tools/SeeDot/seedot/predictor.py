@@ -1,6 +1,7 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT license.
 
+import hashlib
 import os
 import subprocess
 
@@ -19,6 +20,13 @@ class Predictor:
         self.outputDir = outputDir
         os.makedirs(self.outputDir, exist_ok=True)
 
+        # Environment for the mingw toolchain, with the gcc bin-dir prepended
+        # to PATH if one was specified
+        if Common.mingw and Common.gccPath:
+            self.mingwEnv = {**os.environ, "PATH": Common.gccPath + os.pathsep + os.environ["PATH"]}
+        else:
+            self.mingwEnv = os.environ
+
     def buildForWindows(self):
         '''
         Builds using the Predictor.vcxproj project file and creates the executable
@@ -34,7 +42,7 @@ class Predictor:
         with open(logFile, 'w') as file:
             process = subprocess.call(args, stdout=file)
 
-        if process == 1:
+        if process != 0:
             print("FAILED!!\n")
             return False
         else:
@@ -50,7 +58,7 @@ class Predictor:
         with open(logFile, 'w') as file:
             process = subprocess.call(args, stdout=file)
 
-        if process == 1:
+        if process != 0:
             print("FAILED!!\n")
             return False
         else:
@@ -62,32 +70,71 @@ class Predictor:
         Build using makefile with mingw-compiler
         if Common.gccPath is not None, add it to front of path for execution
         '''
-        
-        my_env = os.environ.copy()
-        if (Common.gccPath is not None) and (Common.gccPath):
-            my_env['PATH'] = gccPath+';'+os.environ['PATH']
-            
-        args = ["mimg32-make.exe"]
-            
+        print("Build...", end='')
+
+        args = ["mingw32-make.exe"]
+
         logFile = os.path.join(self.outputDir, "gccbuild.txt")
         with open(logFile, 'w') as file:
-            process = subprocess.call(args, stdout=file, env=my_env)
+            process = subprocess.call(args, stdout=file, env=self.mingwEnv)
 
-        if process == 1:
+        if process != 0:
             print("FAILED!!\n")
             return False
         else:
             print("success")
             return True   
-            
+
+    # Fingerprint of the Predictor sources in the current directory. The
+    # contents are hashed since the generated files are rewritten before every
+    # build even when they are unchanged.
+    def sourceFingerprint(self):
+        digest = hashlib.blake2b()
+
+        entries = [entry for entry in os.scandir(".") if entry.is_file() and (
+            entry.name.endswith((".cpp", ".h", ".vcxproj")) or entry.name == "Makefile")]
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            digest.update(entry.name.encode())
+            with open(entry.path, 'rb') as file:
+                digest.update(file.read())
+
+        return digest.hexdigest()
+
+    def getExecutable(self):
+        if Util.windows():
+            if Common.mingw:
+                return os.path.join("./Predictor.exe")
+            else:
+                return os.path.join("x64", "Release", "Predictor.exe")
+        else:
+            return os.path.join("./Predictor")
+
+    # Build the Predictor project. The build is skipped if the sources are
+    # unchanged since the last successful build. The executable is shared by
+    # all algorithms and versions, hence the fingerprint is kept alongside it.
     def build(self):
+        fingerprint = self.sourceFingerprint()
+        fingerprintFile = ".build_fp"
+
+        if os.path.isfile(fingerprintFile) and os.path.isfile(self.getExecutable()):
+            with open(fingerprintFile, 'r') as file:
+                if file.read() == fingerprint:
+                    print("Build...cached")
+                    return True
+
         if Util.windows():
             if Common.mingw:
-                return self.buildForMingw()
+                res = self.buildForMingw()
             else:
-                return self.buildForWindows()
+                res = self.buildForWindows()
         else:
-            return self.buildForLinux()
+            res = self.buildForLinux()
+
+        if res == True:
+            with open(fingerprintFile, 'w') as file:
+                file.write(fingerprint)
+
+        return res
 
     def executeForWindows(self):
         '''
@@ -106,9 +153,7 @@ class Predictor:
             print("FAILED!!\n")
             return None
         else:
-            print("success")
-            acc = self.readStatsFile()
-            return acc
+            return self.collectStats()
 
     def executeForLinux(self):
         print("Execution...", end='')
@@ -124,9 +169,7 @@ class Predictor:
             print("FAILED!!\n")
             return None
         else:
-            print("success")
-            acc = self.readStatsFile()
-            return acc
+            return self.collectStats()
 
     def executeForMingw(self):
         print("Execution...", end='')
@@ -142,9 +185,7 @@ class Predictor:
             print("FAILED!!\n")
             return None
         else:
-            print("success")
-            acc = self.readStatsFile()
-            return acc
+            return self.collectStats()
 
     def execute(self):
         if Util.windows():
@@ -155,17 +196,30 @@ class Predictor:
         else:
             return self.executeForLinux()
 
+    # Report the outcome of a finished execution and return the accuracy, or
+    # None if the stats could not be parsed
+    def collectStats(self):
+        acc = self.readStatsFile()
+        if acc is None:
+            print("FAILED!! Malformed stats file\n")
+        else:
+            print("success")
+        return acc
+
     # Read statistics of execution (currently only accuracy)
+    # Returns None if the stats file is malformed
     def readStatsFile(self):
         statsFile = os.path.join(
             "output", self.algo + "-" + self.version, "stats-" + self.datasetType + ".txt")
 
-        with open(statsFile, 'r') as file:
-            content = file.readlines()
-
-        stats = [x.strip() for x in content]
+        # Accuracy is on the first line, the remaining lines are not needed
+        with open(statsFile, 'r', errors='ignore') as file:
+            first = file.readline()
 
-        return float(stats[0])
+        try:
+            return float(first.strip())
+        except ValueError:
+            return None
 
     def run(self):
         res = self.build()